@@ -2,10 +2,16 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import json
+import gzip
+import hashlib
+import os
+import tempfile
 import http.client
-from datetime import datetime
+from array import array
+from datetime import datetime, timezone
 from typing import Dict, Optional
 import altair as alt  # Alternativa leve para gráficos
+import pyarrow as pa  # Dependência do Streamlit (formato dos dados dos gráficos)
 
 # Configuração da página
 st.set_page_config(
@@ -21,10 +27,131 @@ API_HOST = "v3.football.api-sports.io"
 LEAGUE_ID = 2  # UEFA Champions League
 SEASON = 2022
 
-# Função para buscar dados da API
-@st.cache_data(persist=True)
-def fetch_all_data():
-    """Busca todos os dados da API uma única vez"""
+# Orçamento de bytes por gráfico (dados enviados ao navegador)
+CHART_MAX_BYTES = int(os.environ.get("CHAMPIONS_CHART_MAX_BYTES", 50_000))
+
+# Configurações do histórico de snapshots
+SNAPSHOT_DIR = os.environ.get("CHAMPIONS_SNAPSHOT_DIR", "snapshots")
+
+# Funções do histórico de snapshots (armazenamento endereçado por conteúdo)
+def _canonical_bytes(obj):
+    """Serializa um objeto JSON de forma determinística"""
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode("utf-8")
+
+def _object_path(digest, snapshot_dir=SNAPSHOT_DIR):
+    """Caminho do objeto comprimido para um hash"""
+    return os.path.join(snapshot_dir, "objects", digest[:2], f"{digest[2:]}.json.gz")
+
+def _manifest_path(snapshot_id, snapshot_dir=SNAPSHOT_DIR):
+    """Caminho do manifesto de um snapshot"""
+    return os.path.join(snapshot_dir, "manifests", f"{snapshot_id}.json.gz")
+
+def _write_atomic(path, data):
+    """Grava bytes num arquivo sem deixar escrita parcial"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Arquivo temporário único: sessões simultâneas não disputam o mesmo nome
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+        f.write(data)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+def _put_object(obj, snapshot_dir=SNAPSHOT_DIR):
+    """Armazena um objeto pelo hash do conteúdo e retorna o hash"""
+    data = _canonical_bytes(obj)
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(digest, snapshot_dir)
+    # Registros iguais já estão gravados: nada a fazer
+    if not os.path.exists(path):
+        _write_atomic(path, gzip.compress(data))
+    return digest
+
+def _get_object(digest, snapshot_dir=SNAPSHOT_DIR):
+    """Lê um objeto armazenado a partir do hash"""
+    with open(_object_path(digest, snapshot_dir), "rb") as f:
+        return json.loads(gzip.decompress(f.read()).decode("utf-8"))
+
+def _record_sort_key(fixture_key):
+    """Ordena ids de partidas numericamente, com chaves posicionais no final"""
+    return (0, int(fixture_key), fixture_key) if fixture_key.isdigit() else (1, 0, fixture_key)
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """Lista os ids dos snapshots em ordem cronológica"""
+    manifests_dir = os.path.join(snapshot_dir, "manifests")
+    if not os.path.isdir(manifests_dir):
+        return []
+    return sorted(
+        name[:-len(".json.gz")] for name in os.listdir(manifests_dir)
+        if name.endswith(".json.gz")
+    )
+
+def load_manifest(snapshot_id, snapshot_dir=SNAPSHOT_DIR):
+    """Carrega o manifesto (hashes por partida) de um snapshot"""
+    with open(_manifest_path(snapshot_id, snapshot_dir), "rb") as f:
+        return json.loads(gzip.decompress(f.read()).decode("utf-8"))
+
+def save_snapshot(raw_data, snapshot_dir=SNAPSHOT_DIR):
+    """Salva o payload da API como snapshot e retorna o id do snapshot
+
+    O payload é dividido em um registro por partida; apenas registros novos
+    são gravados. Se nada mudou desde o último snapshot, o id dele é retornado
+    sem criar um novo manifesto.
+    """
+    envelope = {key: value for key, value in raw_data.items() if key != 'response'}
+    # Lista de pares [id da partida, hash] preserva a ordem original do payload;
+    # partidas sem id usam a posição no payload como chave
+    records = [
+        [_fixture_label(match, position), _put_object(match, snapshot_dir)]
+        for position, match in enumerate(raw_data.get('response', []))
+    ]
+
+    manifest = {
+        'envelope': _put_object(envelope, snapshot_dir),
+        'records': records,
+    }
+
+    # Evitar manifestos repetidos quando a API não trouxe mudanças
+    existing = list_snapshots(snapshot_dir)
+    if existing:
+        last = load_manifest(existing[-1], snapshot_dir)
+        if last['envelope'] == manifest['envelope'] and last['records'] == manifest['records']:
+            return existing[-1]
+
+    created = datetime.now(timezone.utc)
+    snapshot_id = created.strftime("%Y%m%dT%H%M%S%fZ")
+    manifest['created'] = created.isoformat()
+    _write_atomic(_manifest_path(snapshot_id, snapshot_dir), gzip.compress(_canonical_bytes(manifest)))
+    return snapshot_id
+
+def load_snapshot(snapshot_id, snapshot_dir=SNAPSHOT_DIR):
+    """Reconstrói o payload da API como estava no snapshot"""
+    manifest = load_manifest(snapshot_id, snapshot_dir)
+    raw_data = _get_object(manifest['envelope'], snapshot_dir)
+    raw_data['response'] = [
+        _get_object(digest, snapshot_dir) for _, digest in manifest['records']
+    ]
+    return raw_data
+
+def diff_snapshots(snapshot_a, snapshot_b, snapshot_dir=SNAPSHOT_DIR):
+    """Compara dois snapshots e retorna os ids de partidas adicionadas, removidas e alteradas"""
+    records_a = dict(load_manifest(snapshot_a, snapshot_dir)['records'])
+    records_b = dict(load_manifest(snapshot_b, snapshot_dir)['records'])
+    return {
+        'added': sorted(records_b.keys() - records_a.keys(), key=_record_sort_key),
+        'removed': sorted(records_a.keys() - records_b.keys(), key=_record_sort_key),
+        'changed': sorted(
+            (fixture_id for fixture_id in records_a.keys() & records_b.keys()
+             if records_a[fixture_id] != records_b[fixture_id]),
+            key=_record_sort_key
+        ),
+    }
+
+# Função para consultar a API (sem cache): cada coleta gera um snapshot
+def poll_fixtures():
+    """Consulta a API e registra o payload no histórico de snapshots"""
     try:
         conn = http.client.HTTPSConnection(API_HOST)
         headers = {'x-apisports-key': API_KEY}
@@ -36,6 +163,13 @@ def fetch_all_data():
         
         if res.status == 200:
             data = json.loads(res.read().decode("utf-8"))
+            
+            # Guardar snapshot do payload para comparar/reconstruir depois
+            try:
+                save_snapshot(data)
+            except Exception as e:
+                st.warning(f"Não foi possível salvar o snapshot: {str(e)}")
+            
             return data
         else:
             st.error(f"Erro na API: Status {res.status}")
@@ -45,109 +179,245 @@ def fetch_all_data():
         st.error(f"Erro na conexão: {str(e)}")
         return None
 
-# Função para processar os dados
-def process_data(raw_data):
-    """Processa os dados brutos da API"""
-    if not raw_data or 'response' not in raw_data:
-        return None
+# Função para buscar dados da API
+@st.cache_data(persist=True)
+def fetch_all_data():
+    """Busca todos os dados da API uma única vez"""
+    return poll_fixtures()
+
+# Estrutura compacta das partidas
+class FixtureRecords:
+    """Partidas válidas em colunas tipadas, com os problemas de validação resumidos
+
+    Ids, timestamps, gols e vencedores ficam em arrays tipados; times, fases,
+    status e estádios são guardados uma única vez e referenciados por índice.
+    """
+    __slots__ = (
+        'ids', 'timestamps', 'home_goals', 'away_goals', 'home_winner', 'away_winner',
+        'home_team', 'away_team', 'rounds', 'statuses', 'venues',
+        'team_names', 'round_names', 'status_names', 'venue_names',
+        'unplayed', 'errors'
+    )
+
+    def __init__(self):
+        self.ids = array('q')
+        self.timestamps = array('q')
+        self.home_goals = array('h')
+        self.away_goals = array('h')
+        self.home_winner = array('b')
+        self.away_winner = array('b')
+        
+        # Índices nas tabelas de nomes
+        self.home_team = array('I')
+        self.away_team = array('I')
+        self.rounds = array('I')
+        self.statuses = array('I')
+        self.venues = array('I')
+        
+        self.team_names = []
+        self.round_names = []
+        self.status_names = []
+        self.venue_names = []
+        
+        # Partidas sem placar (agendadas/adiadas) e partidas inválidas
+        self.unplayed = 0
+        self.errors = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _column(self, name):
+        """Visão numpy (sem cópia) de uma coluna tipada"""
+        values = getattr(self, name)
+        return np.frombuffer(values, dtype=values.typecode) if len(values) else np.empty(0, dtype=values.typecode)
+
+    def _names(self, name, table):
+        """Traduz uma coluna de índices para os nomes correspondentes"""
+        return np.array(table, dtype=object)[self._column(name)] if table else np.empty(0, dtype=object)
+
+    def matches_frame(self):
+        """Monta o DataFrame de partidas a partir das colunas tipadas"""
+        timestamps = self._column('timestamps')
+        home_goals = self._column('home_goals').astype(np.int64)
+        away_goals = self._column('away_goals').astype(np.int64)
+        home_winner = self._column('home_winner').astype(bool)
+        away_winner = self._column('away_winner').astype(bool)
+        home_team = self._names('home_team', self.team_names)
+        away_team = self._names('away_team', self.team_names)
+        stage_names = [name.split(' - ')[0] for name in self.round_names]
+        
+        return pd.DataFrame({
+            'id': self._column('ids'),
+            'date': pd.to_datetime(timestamps, unit='s', utc=True),
+            'timestamp': timestamps,
+            'status': self._names('statuses', self.status_names),
+            'round': self._names('rounds', self.round_names),
+            'stage': self._names('rounds', stage_names),
+            'venue': self._names('venues', self.venue_names),
+            'home_team': home_team,
+            'away_team': away_team,
+            'home_goals': home_goals,
+            'away_goals': away_goals,
+            'total_goals': home_goals + away_goals,
+            'home_winner': home_winner,
+            'away_winner': away_winner,
+            'winner': np.where(home_winner, home_team, np.where(away_winner, away_team, 'Draw'))
+        })
+
+    def teams_frame(self):
+        """Calcula as estatísticas por time de uma vez só (sem laço por partida)"""
+        n_teams = len(self.team_names)
+        home = self._column('home_team')
+        away = self._column('away_team')
+        home_goals = self._column('home_goals')
+        away_goals = self._column('away_goals')
+        home_winner = self._column('home_winner').astype(bool)
+        away_winner = self._column('away_winner').astype(bool)
+        draw = ~home_winner & ~away_winner
+        
+        def count(home_weights, away_weights):
+            # Soma por time das contribuições como mandante e como visitante
+            return (
+                np.bincount(home, weights=home_weights, minlength=n_teams)
+                + np.bincount(away, weights=away_weights, minlength=n_teams)
+            ).astype(np.int64)
+        
+        ones = np.ones(len(self))
+        teams_df = pd.DataFrame({
+            'games': count(ones, ones),
+            'wins': count(home_winner, away_winner),
+            'draws': count(draw, draw),
+            'losses': count(away_winner, home_winner),
+            'goals_for': count(home_goals, away_goals),
+            'goals_against': count(away_goals, home_goals),
+            'team': self.team_names
+        })
+        
+        # Todo time registrado jogou ao menos uma partida
+        teams_df['goal_diff'] = teams_df['goals_for'] - teams_df['goals_against']
+        teams_df['points'] = teams_df['wins'] * 3 + teams_df['draws']
+        teams_df['win_rate'] = teams_df['wins'] / teams_df['games'] * 100
+        return teams_df
+
+# Função para identificar uma partida nas mensagens de erro
+def _fixture_label(match, index):
+    """Retorna o id da partida, ou a posição no payload quando não há id"""
+    try:
+        return str(match['fixture']['id'])
+    except (KeyError, TypeError):
+        return f"#{index}"
+
+# Limites das colunas tipadas do FixtureRecords
+INT64_RANGE = (-2 ** 63, 2 ** 63 - 1)
+GOALS_RANGE = (0, 2 ** 15 - 1)
+
+# Função para validar um inteiro antes de gravá-lo numa coluna tipada
+def _checked_int(value, field, bounds):
+    """Retorna o valor se for um int (não bool) dentro dos limites; senão levanta ValueError"""
+    if type(value) is not int:
+        raise ValueError(f"{field} não é inteiro: {value!r}")
+    low, high = bounds
+    if not low <= value <= high:
+        raise ValueError(f"{field} fora do intervalo: {value!r}")
+    return value
+
+# Função para validar e compactar as partidas da API
+def parse_fixtures(response):
+    """Valida as partidas em uma única passada e retorna um FixtureRecords"""
+    records = FixtureRecords()
+    lookups = {
+        'team': ({}, records.team_names),
+        'round': ({}, records.round_names),
+        'status': ({}, records.status_names),
+        'venue': ({}, records.venue_names),
+    }
     
-    matches = []
-    teams = {}
+    def intern(kind, value):
+        # Índice do nome na tabela, adicionando na primeira ocorrência
+        index, names = lookups[kind]
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(names)
+            names.append(value)
+        return position
     
-    for match in raw_data['response']:
+    for position, match in enumerate(response):
         try:
-            # Informações básicas
-            match_info = {
-                'id': match['fixture']['id'],
-                'date': match['fixture']['date'],
-                'timestamp': match['fixture']['timestamp'],
-                'status': match['fixture']['status']['short'],
-                'round': match['league']['round'],
-                'stage': match['league']['round'].split(' - ')[0] if ' - ' in match['league']['round'] else match['league']['round'],
-                'venue': match['fixture']['venue']['name'] if match['fixture']['venue'] else 'Unknown',
-                
-                # Times
-                'home_team': match['teams']['home']['name'],
-                'away_team': match['teams']['away']['name'],
-                
-                # Placar
-                'home_goals': match['goals']['home'],
-                'away_goals': match['goals']['away'],
-                'total_goals': match['goals']['home'] + match['goals']['away'],
-                
-                # Resultado
-                'home_winner': match['teams']['home']['winner'],
-                'away_winner': match['teams']['away']['winner'],
-                'winner': match['teams']['home']['name'] if match['teams']['home']['winner'] 
-                         else match['teams']['away']['name'] if match['teams']['away']['winner'] 
-                         else 'Draw'
-            }
+            # Cada campo é lido uma única vez
+            fixture = match['fixture']
+            teams = match['teams']
+            goals = match['goals']
+            home = teams['home']
+            away = teams['away']
             
-            matches.append(match_info)
+            fixture_id = _checked_int(fixture['id'], "id", INT64_RANGE)
+            timestamp = _checked_int(fixture['timestamp'], "timestamp", INT64_RANGE)
+            status = fixture['status']['short']
+            round_name = match['league']['round']
+            venue = fixture['venue']['name'] if fixture['venue'] else None
+            home_name = home['name']
+            away_name = away['name']
+            home_goals = goals['home']
+            away_goals = goals['away']
+            home_winner = home['winner']
+            away_winner = away['winner']
             
-            # Atualizar estatísticas dos times - CORREÇÃO AQUI
-            home_team = match['teams']['home']['name']
-            away_team = match['teams']['away']['name']
+            if not isinstance(home_name, str) or not isinstance(away_name, str):
+                raise ValueError("nome do time ausente")
+            if not isinstance(round_name, str):
+                raise ValueError("rodada ausente")
+            if not isinstance(status, str) or not (venue is None or isinstance(venue, str)):
+                raise ValueError("status ou estádio inválido")
             
-            # Inicializar times se necessário
-            if home_team not in teams:
-                teams[home_team] = {
-                    'games': 0, 'wins': 0, 'draws': 0, 'losses': 0,
-                    'goals_for': 0, 'goals_against': 0
-                }
+            # Partidas ainda sem placar não entram nas estatísticas
+            if home_goals is None or away_goals is None:
+                records.unplayed += 1
+                continue
             
-            if away_team not in teams:
-                teams[away_team] = {
-                    'games': 0, 'wins': 0, 'draws': 0, 'losses': 0,
-                    'goals_for': 0, 'goals_against': 0
-                }
-            
-            # Atualizar estatísticas do time da casa
-            teams[home_team]['games'] += 1
-            teams[home_team]['goals_for'] += match['goals']['home']
-            teams[home_team]['goals_against'] += match['goals']['away']  # CORREÇÃO: gols do visitante
-            
-            # Atualizar estatísticas do time visitante
-            teams[away_team]['games'] += 1
-            teams[away_team]['goals_for'] += match['goals']['away']
-            teams[away_team]['goals_against'] += match['goals']['home']  # CORREÇÃO: gols da casa
-            
-            # Atualizar vitórias/empates/derrotas
-            if match['teams']['home']['winner']:
-                teams[home_team]['wins'] += 1
-                teams[away_team]['losses'] += 1
-            elif match['teams']['away']['winner']:
-                teams[away_team]['wins'] += 1
-                teams[home_team]['losses'] += 1
-            else:  # Empate
-                teams[home_team]['draws'] += 1
-                teams[away_team]['draws'] += 1
-                    
-        except Exception as e:
-            st.warning(f"Erro ao processar partida: {str(e)}")
+            # Tipos e limites checados aqui: nada é gravado se a partida for inválida
+            _checked_int(home_goals, "gols do mandante", GOALS_RANGE)
+            _checked_int(away_goals, "gols do visitante", GOALS_RANGE)
+        except (KeyError, TypeError, ValueError) as e:
+            records.errors.append((_fixture_label(match, position), f"{type(e).__name__}: {e}"))
             continue
+        
+        records.ids.append(fixture_id)
+        records.timestamps.append(timestamp)
+        records.home_goals.append(home_goals)
+        records.away_goals.append(away_goals)
+        records.home_winner.append(home_winner is True)
+        records.away_winner.append(away_winner is True)
+        records.home_team.append(intern('team', home_name))
+        records.away_team.append(intern('team', away_name))
+        records.rounds.append(intern('round', round_name))
+        records.statuses.append(intern('status', status))
+        records.venues.append(intern('venue', venue or 'Unknown'))
+    
+    return records
+
+# Função para processar os dados
+def process_data(raw_data):
+    """Processa os dados brutos da API"""
+    if not raw_data or 'response' not in raw_data:
+        return None
+    
+    records = parse_fixtures(raw_data['response'])
     
     # Converter para DataFrame
-    matches_df = pd.DataFrame(matches)
-    if not matches_df.empty:
-        matches_df['date'] = pd.to_datetime(matches_df['date'])
-        matches_df['date_str'] = matches_df['date'].dt.strftime('%d/%m/%Y %H:%M')
-        matches_df['month'] = matches_df['date'].dt.month_name()
-    
-    # Converter estatísticas dos times para DataFrame
-    teams_stats = []
-    for team_name, stats in teams.items():
-        stats['team'] = team_name
-        stats['goal_diff'] = stats['goals_for'] - stats['goals_against']
-        stats['points'] = stats['wins'] * 3 + stats['draws']
-        stats['win_rate'] = (stats['wins'] / stats['games'] * 100) if stats['games'] > 0 else 0
-        teams_stats.append(stats)
-    
-    teams_df = pd.DataFrame(teams_stats)
+    matches_df = records.matches_frame()
+    matches_df['date_str'] = matches_df['date'].dt.strftime('%d/%m/%Y %H:%M')
+    matches_df['month'] = matches_df['date'].dt.month_name()
+    
+    # Estatísticas dos times calculadas a partir das colunas
+    teams_df = records.teams_frame()
     
     return {
         'matches': matches_df,
-        'teams': teams_df
+        'teams': teams_df,
+        'validation': {
+            'unplayed': records.unplayed,
+            'errors': records.errors
+        }
     }
 
 # Função para calcular médias por time
@@ -176,6 +446,288 @@ def apply_table_style(df, sorted_teams):
     # Aplica o estilo
     return styled_df.style.apply(row_style, axis=1)
 
+# Função para medir o tamanho dos dados de um gráfico
+def _arrow_size(df):
+    """Tamanho em bytes do DataFrame como stream Arrow IPC (formato enviado pelo Streamlit)"""
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.size()
+
+# Função para preparar os dados de um gráfico
+def chart_dataset(df, fields, sort_by=None, ascending=False, max_bytes=CHART_MAX_BYTES):
+    """Reduz um DataFrame aos campos usados no gráfico, dentro do orçamento de bytes
+
+    O tamanho é medido como Arrow IPC, o formato em que o Streamlit envia os
+    dados (o JSON da especificação não entra na conta). Acima do orçamento,
+    mantém o maior top-K por ``sort_by`` que cabe em ``max_bytes``, mas nunca
+    menos de uma linha. Sem ``sort_by`` (dados já agregados, como barras de
+    um histograma) nada é descartado.
+    """
+    data = df[fields].round(4)
+    if sort_by is None:
+        return data
+    data = data.sort_values(sort_by, ascending=ascending).reset_index(drop=True)
+    
+    if _arrow_size(data) <= max_bytes:
+        return data
+    
+    # Busca binária do maior top-K que cabe no orçamento (mínimo de 1 linha)
+    low, high = 1, len(data)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _arrow_size(data.head(middle)) <= max_bytes:
+            low = middle
+        else:
+            high = middle - 1
+    return data.head(low)
+
+# Função para montar rótulos de métricas em expressões Vega
+def _label_expr(field, labels):
+    """Gera uma expressão Vega que troca o nome técnico da métrica pelo rótulo"""
+    expr = f"datum.{field}"
+    for key, label in reversed(list(labels.items())):
+        expr = f"datum.{field} == '{key}' ? '{label}' : ({expr})"
+    return expr
+
+# Função para montar os gráficos interativos (filtros cruzados no navegador)
+def build_interactive_charts(matches_df):
+    """Monta os gráficos da aba Gráficos com filtros cruzados no navegador
+
+    Todos os gráficos usam um único conjunto de dados pré-agregado, enviado
+    uma vez: totais por time × resultado e, só para o histograma, contagens
+    por confronto × resultado × gols. Resultado, métrica, times clicados e
+    faixa de pontos por jogo são aplicados pelo Vega-Lite, sem rerun.
+    """
+    result = np.select(
+        [matches_df['home_winner'] == True, matches_df['away_winner'] == True],
+        ['Vitória Casa', 'Vitória Fora'],
+        default='Empate'
+    )
+    
+    # Totais por time × resultado (o resultado continua filtrável no navegador)
+    sides = []
+    for side, other, win_label in [('home', 'away', 'Vitória Casa'), ('away', 'home', 'Vitória Fora')]:
+        won = result == win_label
+        sides.append(pd.DataFrame({
+            'team': matches_df[f'{side}_team'].to_numpy(),
+            'result': result,
+            'goals_for': matches_df[f'{side}_goals'].to_numpy(),
+            'goals_against': matches_df[f'{other}_goals'].to_numpy(),
+            'wins': won.astype(int),
+            'points': np.where(won, 3, np.where(result == 'Empate', 1, 0)),
+        }))
+    team_totals = pd.concat(sides, ignore_index=True).groupby(['team', 'result'], as_index=False).agg(
+        games=('points', 'size'), wins=('wins', 'sum'), points=('points', 'sum'),
+        goals_for=('goals_for', 'sum'), goals_against=('goals_against', 'sum')
+    )
+    team_totals['kind'] = 'team'
+    
+    # Histograma precisa dos dois times de cada partida: contagens por confronto
+    match_totals = pd.DataFrame({
+        'home_team': matches_df['home_team'].to_numpy(),
+        'away_team': matches_df['away_team'].to_numpy(),
+        'result': result,
+        'total_goals': matches_df['total_goals'].to_numpy(),
+    }).groupby(['home_team', 'away_team', 'result', 'total_goals'], as_index=False).size().rename(
+        columns={'size': 'matches'}
+    )
+    match_totals['kind'] = 'match'
+    
+    chart_data = pd.concat([team_totals, match_totals], ignore_index=True)
+    
+    # Parâmetros e seleções compartilhados entre os gráficos
+    result_param = alt.param(
+        name='resultado',
+        value='Todos',
+        bind=alt.binding_select(options=["Todos", "Vitória Casa", "Vitória Fora", "Empate"], name='Resultado ')
+    )
+    metric_param = alt.param(
+        name='metrica',
+        value='avg_goals_for',
+        bind=alt.binding_select(
+            options=['avg_goals_for', 'avg_goals_against', 'avg_goal_diff'],
+            labels=['Média de Gols Marcados', 'Média de Gols Sofridos', 'Saldo de Gols'],
+            name='Comparar Pontos por Jogo com '
+        )
+    )
+    team_select = alt.selection_point(name='times', fields=['team'])
+    brush = alt.selection_interval(name='faixa', encodings=['x'])
+    
+    def rows(chart, kind):
+        # Linhas de um tipo, filtradas pelo resultado escolhido
+        return chart.transform_filter(
+            alt.datum.kind == kind
+        ).transform_filter(
+            (result_param == 'Todos') | (alt.datum.result == result_param)
+        )
+    
+    def teams(chart):
+        # Estatísticas e médias por time calculadas no navegador
+        return rows(chart, 'team').transform_aggregate(
+            games='sum(games)', wins='sum(wins)', goals_for='sum(goals_for)',
+            goals_against='sum(goals_against)', points='sum(points)', groupby=['team']
+        ).transform_calculate(
+            goal_diff='datum.goals_for - datum.goals_against',
+            avg_goals_for='datum.goals_for / datum.games',
+            avg_goals_against='datum.goals_against / datum.games',
+            avg_goal_diff='(datum.goals_for - datum.goals_against) / datum.games',
+            points_per_game='datum.points / datum.games',
+            win_rate='datum.wins / datum.games * 100'
+        )
+    
+    # Top 10 ataque e defesa, recalculados com o resultado e a faixa escolhidos
+    scoring_chart = teams(alt.Chart()).transform_filter(brush).transform_window(
+        position='row_number()', sort=[alt.SortField('avg_goals_for', order='descending')]
+    ).transform_filter(
+        'datum.position <= 10'
+    ).mark_bar(color='#4CAF50').encode(
+        x=alt.X('team:N', title='Time', sort='-y'),
+        y=alt.Y('avg_goals_for:Q', title='Média de Gols por Jogo'),
+        opacity=alt.condition(team_select, alt.value(1.0), alt.value(0.3)),
+        tooltip=['team:N', alt.Tooltip('avg_goals_for:Q', title='Média', format='.2f')]
+    ).properties(
+        width=350,
+        height=300,
+        title="Top 10 Times - Média de Gols Marcados"
+    )
+    
+    defense_chart = teams(alt.Chart()).transform_filter(brush).transform_window(
+        position='row_number()', sort=[alt.SortField('avg_goals_against', order='ascending')]
+    ).transform_filter(
+        'datum.position <= 10'
+    ).mark_bar(color='#2196F3').encode(
+        x=alt.X('team:N', title='Time', sort='y'),
+        y=alt.Y('avg_goals_against:Q', title='Média de Gols Sofridos por Jogo'),
+        opacity=alt.condition(team_select, alt.value(1.0), alt.value(0.3)),
+        tooltip=['team:N', alt.Tooltip('avg_goals_against:Q', title='Média', format='.2f')]
+    ).properties(
+        width=350,
+        height=300,
+        title="Top 10 Times - Melhor Defesa"
+    )
+    
+    # Histograma: diferente do da aba Estatísticas, conta só as partidas dos
+    # times clicados (mandante ou visitante)
+    histogram = rows(alt.Chart(), 'match').transform_filter(
+        f"!length(data('{team_select.name}_store'))"
+        f" || vlSelectionTest('{team_select.name}_store', {{team: datum.home_team}})"
+        f" || vlSelectionTest('{team_select.name}_store', {{team: datum.away_team}})"
+    ).transform_aggregate(
+        Partidas='sum(matches)', groupby=['total_goals']
+    ).mark_bar().encode(
+        x=alt.X('total_goals:O', title='Total de Gols'),
+        y=alt.Y('Partidas:Q', title='Número de Partidas'),
+        tooltip=[alt.Tooltip('total_goals:O', title='Gols'), 'Partidas:Q']
+    ).properties(
+        width=350,
+        height=300,
+        title="Gols por Partida - Times Clicados"
+    )
+    
+    # Dispersão: clique seleciona times, arrastar define a faixa de pontos por jogo
+    scatter_points = alt.Chart().mark_circle(size=100).encode(
+        x=alt.X('points_per_game:Q', title='Pontos por Jogo'),
+        y=alt.Y('y_value:Q', title='Métrica selecionada'),
+        color=alt.condition(team_select, alt.value('#4CAF50'), alt.value('lightgray')),
+        tooltip=['team:N', alt.Tooltip('points_per_game:Q', format='.2f'),
+                 alt.Tooltip('y_value:Q', title='Valor', format='.2f'), 'games:Q']
+    ).add_params(team_select, brush)
+    
+    scatter_text = alt.Chart().mark_text(dy=-10, fontSize=10).encode(
+        x=alt.X('points_per_game:Q'),
+        y=alt.Y('y_value:Q'),
+        text='team:N'
+    )
+    
+    scatter_chart = teams(alt.layer(scatter_points, scatter_text)).transform_calculate(
+        y_value=f"datum[{metric_param.name}]"
+    ).properties(
+        width=450,
+        height=300,
+        title="Pontos por Jogo vs Métrica (clique/arraste para filtrar)"
+    )
+    
+    # Comparação: times selecionados (ou todos) na faixa escolhida
+    compare_metrics = {
+        'avg_goals_for': 'Gols Marcados/Jogo',
+        'avg_goals_against': 'Gols Sofridos/Jogo',
+        'points_per_game': 'Pontos/Jogo'
+    }
+    compare_chart = teams(alt.Chart()).transform_filter(team_select).transform_filter(brush).transform_fold(
+        list(compare_metrics), as_=['metric', 'value']
+    ).transform_calculate(
+        metric=_label_expr('metric', compare_metrics)
+    ).mark_bar().encode(
+        x=alt.X('team:N', title='Time'),
+        y=alt.Y('value:Q', title='Valor'),
+        color=alt.Color('metric:N', title='Métrica'),
+        column=alt.Column('metric:N', title='Métrica'),
+        tooltip=['team:N', 'metric:N', alt.Tooltip('value:Q', format='.2f')]
+    ).properties(
+        width=150,
+        height=300
+    )
+    
+    # Heatmap: top 15 por pontos por jogo, destacando os times selecionados
+    heatmap_metrics = {
+        'avg_goals_for': 'Gols Marcados',
+        'avg_goals_against': 'Gols Sofridos',
+        'goal_diff': 'Saldo de Gols',
+        'points_per_game': 'Pontos/Jogo',
+        'win_rate': '% Vitórias'
+    }
+    heatmap = teams(alt.Chart()).transform_filter(brush).transform_window(
+        position='row_number()', sort=[alt.SortField('points_per_game', order='descending')]
+    ).transform_filter(
+        'datum.position <= 15'
+    ).transform_joinaggregate(
+        **{f'{m}_min': f'min({m})' for m in heatmap_metrics},
+        **{f'{m}_max': f'max({m})' for m in heatmap_metrics}
+    ).transform_calculate(
+        **{
+            f'{m}_norm': (
+                f"datum.{m}_max > datum.{m}_min ? "
+                f"(datum.{m} - datum.{m}_min) / (datum.{m}_max - datum.{m}_min) : 0"
+            )
+            for m in heatmap_metrics
+        }
+    ).transform_fold(
+        [f'{m}_norm' for m in heatmap_metrics], as_=['metric', 'normalized_value']
+    ).transform_calculate(
+        metric=_label_expr('metric', {f'{m}_norm': label for m, label in heatmap_metrics.items()})
+    ).mark_rect().encode(
+        x=alt.X('metric:N', title='Métrica', axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y('team:N', title='Time', sort=alt.EncodingSortField('points_per_game', order='descending')),
+        color=alt.Color('normalized_value:Q',
+                        scale=alt.Scale(scheme='redyellowgreen'),
+                        title='Performance'),
+        opacity=alt.condition(team_select, alt.value(1.0), alt.value(0.3)),
+        tooltip=['team:N', 'metric:N', alt.Tooltip('normalized_value:Q', title='Score', format='.2f')]
+    ).properties(
+        width=300,
+        height=400,
+        title="Heatmap de Performance - Top 15 Times"
+    )
+    
+    return alt.vconcat(
+        alt.hconcat(scoring_chart, defense_chart),
+        alt.hconcat(histogram, scatter_chart),
+        alt.hconcat(compare_chart, heatmap).resolve_scale(color='independent'),
+        data=chart_data
+    ).add_params(
+        result_param, metric_param
+    ).resolve_scale(
+        color='independent'
+    )
+
+# Função para gerar os gráficos interativos uma vez por conjunto de partidas
+@st.cache_data(show_spinner=False)
+def interactive_chart_spec(matches_df):
+    """Especificação Vega-Lite dos gráficos interativos, montada e validada uma vez"""
+    return build_interactive_charts(matches_df).to_dict()
+
 # Título do Dashboard
 st.title("⚽ UEFA Champions League 2022/23")
 st.markdown("### Dashboard Completo da Temporada")
@@ -240,10 +792,33 @@ teams_df = processed_data['teams']
 
 # Informações na sidebar
 st.sidebar.success("✅ Dados carregados")
+
+# Nova coleta sob demanda (fora do cache), registrada no histórico de snapshots
+if st.sidebar.button("🔄 Nova Coleta da API", use_container_width=True):
+    with st.spinner("🔄 Buscando dados atualizados..."):
+        raw_data = poll_fixtures()
+        refreshed_data = process_data(raw_data) if raw_data else None
+        if refreshed_data is not None:
+            st.session_state.processed_data = refreshed_data
+            st.rerun()
+        else:
+            st.sidebar.error("❌ Falha ao atualizar os dados")
 st.sidebar.metric("Total de Partidas", len(matches_df))
 st.sidebar.metric("Times Participantes", len(teams_df))
 st.sidebar.metric("Total de Gols", matches_df['total_goals'].sum())
 
+# Resumo da validação das partidas (um único aviso em vez de um por partida)
+validation = processed_data.get('validation', {})
+if validation.get('unplayed'):
+    st.sidebar.caption(f"⏳ {validation['unplayed']} partida(s) ainda sem placar não entram nas estatísticas")
+if validation.get('errors'):
+    st.sidebar.warning(f"⚠️ {len(validation['errors'])} partida(s) ignorada(s) por dados inválidos")
+    with st.sidebar.expander("Ver partidas ignoradas"):
+        for fixture_label, message in validation['errors'][:50]:
+            st.caption(f"{fixture_label}: {message}")
+        if len(validation['errors']) > 50:
+            st.caption(f"... e mais {len(validation['errors']) - 50}")
+
 # Filtros na sidebar
 st.sidebar.header("🔍 Filtros")
 
@@ -255,10 +830,17 @@ selected_phases = st.sidebar.multiselect(
     default=phases[:5] if len(phases) > 5 else phases
 )
 
-# Filtro por resultado
+# Modo interativo: filtros da aba Gráficos aplicados no navegador, sem rerun
+interactive_charts = st.sidebar.toggle(
+    "⚡ Gráficos interativos",
+    help="Resultado, métrica e times são filtrados direto no navegador na aba Gráficos"
+)
+
+# Filtro por resultado (no modo interativo, a aba Gráficos usa o seletor dos próprios gráficos)
 result_filter = st.sidebar.selectbox(
     "Resultado",
-    ["Todos", "Vitória Casa", "Vitória Fora", "Empate"]
+    ["Todos", "Vitória Casa", "Vitória Fora", "Empate"],
+    help="No modo interativo, a aba Gráficos usa o seletor de resultado dos próprios gráficos" if interactive_charts else None
 )
 
 # Aplicar filtros
@@ -348,10 +930,11 @@ with tab1:
         hist_data.columns = ['Gols', 'Partidas']
         hist_data = hist_data.sort_values('Gols')
         
-        chart = alt.Chart(hist_data).mark_bar().encode(
+        hist_dataset = chart_dataset(hist_data, ['Gols', 'Partidas'])
+        chart = alt.Chart(hist_dataset).mark_bar().encode(
             x=alt.X('Gols:O', title='Total de Gols'),
             y=alt.Y('Partidas:Q', title='Número de Partidas'),
-            tooltip=['Gols', 'Partidas']
+            tooltip=['Gols:O', 'Partidas:Q']
         ).properties(
             height=300
         )
@@ -496,183 +1079,213 @@ with tab4:  # Nova aba de gráficos
     # Calcular médias
     teams_with_avg = calculate_team_averages(teams_df)
     
-    # Gráfico 1: Média de gols marcados por time
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("🏹 Média de Gols Marcados por Jogo")
+    if interactive_charts:
+        st.caption("Clique em um time na dispersão (shift+clique para vários) ou arraste para escolher "
+                   "uma faixa de pontos por jogo. Resultado e métrica são escolhidos abaixo dos gráficos "
+                   "(o filtro de resultado da barra lateral não se aplica a esta aba).")
+        st.caption("Assim como no modo padrão e na tabela abaixo, os gráficos consideram todas as fases; "
+                   "com Resultado = Todos, os números coincidem com a tabela.")
         
-        # Ordenar times por média de gols marcados
-        top_scorers = teams_with_avg.sort_values('avg_goals_for', ascending=False).head(10)
+        # Mesmos dados do modo padrão (teams_df); filtros só no navegador
+        if not matches_df.empty:
+            st.vega_lite_chart(interactive_chart_spec(matches_df))
+        else:
+            st.info("Nenhuma partida encontrada")
+    else:
+        # Gráfico 1: Média de gols marcados por time
+        col1, col2 = st.columns(2)
         
-        # Criar gráfico de barras
-        chart_scoring = alt.Chart(top_scorers).mark_bar(color='#4CAF50').encode(
-            x=alt.X('team:N', title='Time', sort='-y'),
-            y=alt.Y('avg_goals_for:Q', title='Média de Gols por Jogo'),
-            tooltip=['team', alt.Tooltip('avg_goals_for:Q', title='Média', format='.2f')]
-        ).properties(
-            height=400,
-            title="Top 10 Times - Média de Gols Marcados"
+        with col1:
+            st.subheader("🏹 Média de Gols Marcados por Jogo")
+            
+            # Ordenar times por média de gols marcados
+            top_scorers = teams_with_avg.sort_values('avg_goals_for', ascending=False).head(10)
+            
+            # Criar gráfico de barras
+            scoring_dataset = chart_dataset(top_scorers, ['team', 'avg_goals_for'], sort_by='avg_goals_for')
+            chart_scoring = alt.Chart(scoring_dataset).mark_bar(color='#4CAF50').encode(
+                x=alt.X('team:N', title='Time', sort='-y'),
+                y=alt.Y('avg_goals_for:Q', title='Média de Gols por Jogo'),
+                tooltip=['team:N', alt.Tooltip('avg_goals_for:Q', title='Média', format='.2f')]
+            ).properties(
+                height=400,
+                title="Top 10 Times - Média de Gols Marcados"
+            )
+            
+            st.altair_chart(chart_scoring, use_container_width=True)
+        
+        with col2:
+            st.subheader("🛡️ Média de Gols Sofridos por Jogo")
+            
+            # Ordenar times por melhor defesa (menos gols sofridos)
+            best_defense = teams_with_avg.sort_values('avg_goals_against', ascending=True).head(10)
+            
+            # Criar gráfico de barras
+            defense_dataset = chart_dataset(best_defense, ['team', 'avg_goals_against'], sort_by='avg_goals_against', ascending=True)
+            chart_defense = alt.Chart(defense_dataset).mark_bar(color='#2196F3').encode(
+                x=alt.X('team:N', title='Time', sort='y'),
+                y=alt.Y('avg_goals_against:Q', title='Média de Gols Sofridos por Jogo'),
+                tooltip=['team:N', alt.Tooltip('avg_goals_against:Q', title='Média', format='.2f')]
+            ).properties(
+                height=400,
+                title="Top 10 Times - Melhor Defesa"
+            )
+            
+            st.altair_chart(chart_defense, use_container_width=True)
+        
+        # Gráfico 2: Pontos por jogo vs Média de gols
+        st.subheader("⚡ Pontos por Jogo vs Média de Gols")
+        
+        # Selecionar métrica para comparar
+        metric_choice = st.selectbox(
+            "Comparar Pontos por Jogo com:",
+            ["Média de Gols Marcados", "Média de Gols Sofridos", "Saldo de Gols"]
         )
         
-        st.altair_chart(chart_scoring, use_container_width=True)
-    
-    with col2:
-        st.subheader("🛡️ Média de Gols Sofridos por Jogo")
+        if metric_choice == "Média de Gols Marcados":
+            y_metric = 'avg_goals_for'
+            y_title = 'Média Gols Marcados'
+            # Usando esquema de cores válido do Altair
+            color_scale = alt.Scale(scheme='greens')
+        elif metric_choice == "Média de Gols Sofridos":
+            y_metric = 'avg_goals_against'
+            y_title = 'Média Gols Sofridos'
+            color_scale = alt.Scale(scheme='blues')
+        else:
+            y_metric = 'avg_goal_diff'
+            y_title = 'Saldo Médio de Gols'
+            color_scale = alt.Scale(scheme='purples')
+        
+        # Preparar dados para scatter plot (um único dataset para pontos e labels)
+        scatter_dataset = chart_dataset(
+            teams_with_avg, ['team', 'points_per_game', y_metric, 'games'], sort_by='points_per_game'
+        )
+        
+        # Criar scatter plot - CORREÇÃO APLICADA AQUI
+        scatter_chart = alt.Chart().mark_circle(size=100, opacity=0.7).encode(
+            x=alt.X('points_per_game:Q', title='Pontos por Jogo'),
+            y=alt.Y(f'{y_metric}:Q', title=y_title),
+            color=alt.Color(f'{y_metric}:Q', scale=color_scale, legend=None),
+            tooltip=['team:N', 'points_per_game:Q', f'{y_metric}:Q', 'games:Q']
+        )
         
-        # Ordenar times por melhor defesa (menos gols sofridos)
-        best_defense = teams_with_avg.sort_values('avg_goals_against', ascending=True).head(10)
+        # Adicionar labels para os times
+        text_chart = alt.Chart().mark_text(dy=-10, fontSize=10).encode(
+            x=alt.X('points_per_game:Q'),
+            y=alt.Y(f'{y_metric}:Q'),
+            text='team:N'
+        )
         
-        # Criar gráfico de barras
-        chart_defense = alt.Chart(best_defense).mark_bar(color='#2196F3').encode(
-            x=alt.X('team:N', title='Time', sort='y'),
-            y=alt.Y('avg_goals_against:Q', title='Média de Gols Sofridos por Jogo'),
-            tooltip=['team', alt.Tooltip('avg_goals_against:Q', title='Média', format='.2f')]
+        scatter_layer = alt.layer(
+            scatter_chart, text_chart, data=scatter_dataset
         ).properties(
             height=400,
-            title="Top 10 Times - Melhor Defesa"
+            title=f"Relação: Pontos por Jogo vs {metric_choice}"
         )
         
-        st.altair_chart(chart_defense, use_container_width=True)
-    
-    # Gráfico 2: Pontos por jogo vs Média de gols
-    st.subheader("⚡ Pontos por Jogo vs Média de Gols")
-    
-    # Selecionar métrica para comparar
-    metric_choice = st.selectbox(
-        "Comparar Pontos por Jogo com:",
-        ["Média de Gols Marcados", "Média de Gols Sofridos", "Saldo de Gols"]
-    )
-    
-    # Preparar dados para scatter plot
-    scatter_data = teams_with_avg.copy()
-    
-    if metric_choice == "Média de Gols Marcados":
-        y_metric = 'avg_goals_for'
-        y_title = 'Média Gols Marcados'
-        # Usando esquema de cores válido do Altair
-        color_scale = alt.Scale(scheme='greens')
-    elif metric_choice == "Média de Gols Sofridos":
-        y_metric = 'avg_goals_against'
-        y_title = 'Média Gols Sofridos'
-        color_scale = alt.Scale(scheme='blues')
-    else:
-        y_metric = 'avg_goal_diff'
-        y_title = 'Saldo Médio de Gols'
-        color_scale = alt.Scale(scheme='purples')
-    
-    # Criar scatter plot - CORREÇÃO APLICADA AQUI
-    scatter_chart = alt.Chart(scatter_data).mark_circle(size=100, opacity=0.7).encode(
-        x=alt.X('points_per_game:Q', title='Pontos por Jogo'),
-        y=alt.Y(f'{y_metric}:Q', title=y_title),
-        color=alt.Color(f'{y_metric}:Q', scale=color_scale, legend=None),
-        tooltip=['team', 'points_per_game', y_metric, 'games']
-    ).properties(
-        height=400,
-        title=f"Relação: Pontos por Jogo vs {metric_choice}"
-    )
-    
-    # Adicionar labels para os times
-    text_chart = alt.Chart(scatter_data).mark_text(dy=-10, fontSize=10).encode(
-        x=alt.X('points_per_game:Q'),
-        y=alt.Y(f'{y_metric}:Q'),
-        text='team'
-    )
-    
-    st.altair_chart(scatter_chart + text_chart, use_container_width=True)
-    
-    # Gráfico 3: Comparação completa de médias
-    st.subheader("📈 Comparação Completa de Médias")
-    
-    # Selecionar times para comparar
-    selected_teams = st.multiselect(
-        "Selecione times para comparar:",
-        teams_with_avg['team'].tolist(),
-        default=teams_with_avg['team'].head(5).tolist()
-    )
-    
-    if selected_teams:
-        # Filtrar dados
-        compare_data = teams_with_avg[teams_with_avg['team'].isin(selected_teams)].melt(
-            id_vars=['team'],
-            value_vars=['avg_goals_for', 'avg_goals_against', 'points_per_game'],
-            var_name='metric',
-            value_name='value'
+        st.altair_chart(scatter_layer, use_container_width=True)
+        
+        if len(scatter_dataset) < len(teams_with_avg):
+            st.caption(f"Mostrando {len(scatter_dataset)} de {len(teams_with_avg)} times "
+                       "(maiores pontos por jogo) para respeitar o limite de dados do gráfico.")
+        
+        # Gráfico 3: Comparação completa de médias
+        st.subheader("📈 Comparação Completa de Médias")
+        
+        # Selecionar times para comparar
+        selected_teams = st.multiselect(
+            "Selecione times para comparar:",
+            teams_with_avg['team'].tolist(),
+            default=teams_with_avg['team'].head(5).tolist()
         )
         
+        if selected_teams:
+            # Mapear nomes das métricas
+            metric_names = {
+                'avg_goals_for': 'Gols Marcados/Jogo',
+                'avg_goals_against': 'Gols Sofridos/Jogo',
+                'points_per_game': 'Pontos/Jogo'
+            }
+            
+            # Filtrar dados (formato largo; o formato longo é montado no navegador)
+            compare_dataset = chart_dataset(
+                teams_with_avg[teams_with_avg['team'].isin(selected_teams)],
+                ['team'] + list(metric_names),
+                sort_by='points_per_game'
+            )
+            
+            # Criar gráfico de barras agrupadas
+            compare_chart = alt.Chart(compare_dataset).transform_fold(
+                list(metric_names), as_=['metric', 'value']
+            ).transform_calculate(
+                metric=_label_expr('metric', metric_names)
+            ).mark_bar().encode(
+                x=alt.X('team:N', title='Time'),
+                y=alt.Y('value:Q', title='Valor'),
+                color=alt.Color('metric:N', title='Métrica'),
+                column=alt.Column('metric:N', title='Métrica'),
+                tooltip=['team:N', 'metric:N', alt.Tooltip('value:Q', format='.2f')]
+            ).properties(
+                width=150,
+                height=300
+            )
+            
+            st.altair_chart(compare_chart, use_container_width=True)
+            
+            if len(compare_dataset) < len(selected_teams):
+                hidden_teams = sorted(set(selected_teams) - set(compare_dataset['team']))
+                st.caption(f"{len(hidden_teams)} time(s) omitido(s) para respeitar o limite de dados do gráfico: "
+                           f"{', '.join(hidden_teams)}")
+        
+        # Gráfico 4: Heatmap de performance
+        st.subheader("🔥 Heatmap de Performance")
+        
+        # Preparar dados para heatmap
+        heatmap_data = teams_with_avg.sort_values('points_per_game', ascending=False).head(15).copy()
+        
+        # Normalizar dados para o heatmap
+        metrics_for_heatmap = ['avg_goals_for', 'avg_goals_against', 'goal_diff', 'points_per_game', 'win_rate']
+        heatmap_data_normalized = heatmap_data.copy()
+        
+        for metric in metrics_for_heatmap:
+            heatmap_data_normalized[f'{metric}_norm'] = (
+                (heatmap_data[metric] - heatmap_data[metric].min()) / 
+                (heatmap_data[metric].max() - heatmap_data[metric].min())
+            )
+        
         # Mapear nomes das métricas
-        metric_names = {
-            'avg_goals_for': 'Gols Marcados/Jogo',
-            'avg_goals_against': 'Gols Sofridos/Jogo',
-            'points_per_game': 'Pontos/Jogo'
+        metric_labels = {
+            'avg_goals_for_norm': 'Gols Marcados',
+            'avg_goals_against_norm': 'Gols Sofridos',
+            'goal_diff_norm': 'Saldo de Gols',
+            'points_per_game_norm': 'Pontos/Jogo',
+            'win_rate_norm': '% Vitórias'
         }
         
-        compare_data['metric'] = compare_data['metric'].map(metric_names)
+        # Enviar formato largo; a transformação para formato longo ocorre no navegador
+        heatmap_dataset = chart_dataset(
+            heatmap_data_normalized, ['team'] + list(metric_labels), sort_by='points_per_game_norm'
+        )
         
-        # Criar gráfico de barras agrupadas
-        compare_chart = alt.Chart(compare_data).mark_bar().encode(
-            x=alt.X('team:N', title='Time'),
-            y=alt.Y('value:Q', title='Valor'),
-            color=alt.Color('metric:N', title='Métrica'),
-            column=alt.Column('metric:N', title='Métrica'),
-            tooltip=['team', 'metric', alt.Tooltip('value:Q', format='.2f')]
+        # Criar heatmap
+        heatmap = alt.Chart(heatmap_dataset).transform_fold(
+            list(metric_labels), as_=['metric', 'normalized_value']
+        ).transform_calculate(
+            metric=_label_expr('metric', metric_labels)
+        ).mark_rect().encode(
+            x=alt.X('metric:N', title='Métrica', axis=alt.Axis(labelAngle=-45)),
+            y=alt.Y('team:N', title='Time', sort='-x'),
+            color=alt.Color('normalized_value:Q', 
+                           scale=alt.Scale(scheme='redyellowgreen'),
+                           title='Performance'),
+            tooltip=['team:N', 'metric:N', alt.Tooltip('normalized_value:Q', title='Score', format='.2f')]
         ).properties(
-            width=150,
-            height=300
+            height=400,
+            title="Heatmap de Performance - Top 15 Times"
         )
         
-        st.altair_chart(compare_chart, use_container_width=True)
-    
-    # Gráfico 4: Heatmap de performance
-    st.subheader("🔥 Heatmap de Performance")
-    
-    # Preparar dados para heatmap
-    heatmap_data = teams_with_avg.sort_values('points_per_game', ascending=False).head(15).copy()
-    
-    # Normalizar dados para o heatmap
-    metrics_for_heatmap = ['avg_goals_for', 'avg_goals_against', 'goal_diff', 'points_per_game', 'win_rate']
-    heatmap_data_normalized = heatmap_data.copy()
-    
-    for metric in metrics_for_heatmap:
-        heatmap_data_normalized[f'{metric}_norm'] = (
-            (heatmap_data[metric] - heatmap_data[metric].min()) / 
-            (heatmap_data[metric].max() - heatmap_data[metric].min())
-        )
-    
-    # Transformar para formato longo
-    heatmap_long = heatmap_data_normalized.melt(
-        id_vars=['team'],
-        value_vars=[f'{m}_norm' for m in metrics_for_heatmap],
-        var_name='metric',
-        value_name='normalized_value'
-    )
-    
-    # Mapear nomes das métricas
-    metric_labels = {
-        'avg_goals_for_norm': 'Gols Marcados',
-        'avg_goals_against_norm': 'Gols Sofridos',
-        'goal_diff_norm': 'Saldo de Gols',
-        'points_per_game_norm': 'Pontos/Jogo',
-        'win_rate_norm': '% Vitórias'
-    }
-    
-    heatmap_long['metric'] = heatmap_long['metric'].map(metric_labels)
-    
-    # Criar heatmap
-    heatmap = alt.Chart(heatmap_long).mark_rect().encode(
-        x=alt.X('metric:N', title='Métrica', axis=alt.Axis(labelAngle=-45)),
-        y=alt.Y('team:N', title='Time', sort='-x'),
-        color=alt.Color('normalized_value:Q', 
-                       scale=alt.Scale(scheme='redyellowgreen'),
-                       title='Performance'),
-        tooltip=['team', 'metric', alt.Tooltip('normalized_value:Q', title='Score', format='.2f')]
-    ).properties(
-        height=400,
-        title="Heatmap de Performance - Top 15 Times"
-    )
-    
-    st.altair_chart(heatmap, use_container_width=True)
-    
+        st.altair_chart(heatmap, use_container_width=True)
+        
     # Tabela de médias
     st.subheader("📋 Tabela Completa de Médias")
     
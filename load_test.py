@@ -0,0 +1,348 @@
+"""Teste de carga do dashboard com sessões simultâneas
+
+Executa N sessões simuladas de ``champions_dashboard_final.py`` com o AppTest
+do Streamlit, sem navegador e sem rede: a API-Football é substituída por um
+stub local que devolve uma temporada sintética. Cada sessão percorre os
+filtros da sidebar, a busca da aba Partidas e as seleções da aba Gráficos.
+
+Uso:
+    python load_test.py --sessions 1 2 4 8 --iterations 3
+
+Cada quantidade de sessões é medida no modo padrão e no modo de gráficos
+interativos. O relatório (latência p50/p95/p99 por rerun, CPU e pico de
+memória residente por sessão) é impresso e salvo em
+``load_test_reports/<commit>.json``.
+"""
+import argparse
+import atexit
+import http.client
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "champions_dashboard_final.py")
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_test_reports")
+RUN_TIMEOUT = 60
+
+MODES = ["padrao", "interativo"]
+RSS_SAMPLE_INTERVAL = 0.02
+
+# Isolar cache persistente e snapshots do usuário antes de importar o Streamlit;
+# o diretório temporário é removido ao final da execução
+_SANDBOX = tempfile.TemporaryDirectory(prefix="champions_load_test_")
+atexit.register(_SANDBOX.cleanup)
+os.environ["HOME"] = _SANDBOX.name
+os.environ["CHAMPIONS_SNAPSHOT_DIR"] = os.path.join(_SANDBOX.name, "snapshots")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+# Stub local da API-Football
+def build_stub_payload(seed=2022, n_teams=32):
+    """Gera uma temporada sintética no formato do endpoint /fixtures"""
+    rng = random.Random(seed)
+    teams = [f"Team {i:02d}" for i in range(n_teams)]
+    kickoff = datetime(2022, 9, 6, 19, 0, tzinfo=timezone.utc)
+    fixtures = []
+
+    def add_fixture(round_name, home, away):
+        home_goals, away_goals = rng.randint(0, 4), rng.randint(0, 4)
+        date = kickoff + timedelta(days=len(fixtures) // 8 * 7)
+        fixtures.append({
+            'fixture': {
+                'id': 1000 + len(fixtures),
+                'date': date.isoformat(),
+                'timestamp': int(date.timestamp()),
+                'status': {'short': 'FT'},
+                'venue': {'name': f"Stadium {home}"},
+            },
+            'league': {'id': 2, 'season': 2022, 'round': round_name},
+            'teams': {
+                'home': {'name': home, 'winner': home_goals > away_goals if home_goals != away_goals else None},
+                'away': {'name': away, 'winner': away_goals > home_goals if home_goals != away_goals else None},
+            },
+            'goals': {'home': home_goals, 'away': away_goals},
+        })
+
+    # Fase de grupos: 8 grupos de 4, turno e returno
+    for group in range(0, n_teams, 4):
+        members = teams[group:group + 4]
+        for matchday, (a, b) in enumerate([(0, 1), (2, 3), (0, 2), (1, 3), (0, 3), (1, 2)], start=1):
+            add_fixture(f"Group Stage - {matchday}", members[a], members[b])
+            add_fixture(f"Group Stage - {matchday}", members[b], members[a])
+
+    # Mata-mata com confrontos de ida e volta
+    remaining = teams[::2]
+    for stage in ["Round of 16", "Quarter-finals", "Semi-finals"]:
+        next_round = []
+        for i in range(0, len(remaining), 2):
+            add_fixture(f"{stage} - 1st Leg", remaining[i], remaining[i + 1])
+            add_fixture(f"{stage} - 2nd Leg", remaining[i + 1], remaining[i])
+            next_round.append(remaining[i])
+        remaining = next_round
+    add_fixture("Final", remaining[0], remaining[1])
+
+    return {
+        'get': 'fixtures',
+        'parameters': {'league': '2', 'season': '2022'},
+        'errors': [],
+        'results': len(fixtures),
+        'response': fixtures,
+    }
+
+
+class _StubResponse:
+    """Resposta HTTP mínima usada pelo fetch_all_data"""
+
+    status = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def read(self):
+        return self._body
+
+
+class StubHTTPSConnection:
+    """Substitui http.client.HTTPSConnection servindo o payload sintético"""
+
+    body = b""
+
+    def __init__(self, host, *args, **kwargs):
+        self.host = host
+
+    def request(self, method, url, headers=None):
+        pass
+
+    def getresponse(self):
+        return _StubResponse(self.body)
+
+
+# Roteiro de cada sessão
+def _widget(elements, label):
+    """Localiza um widget pelo rótulo"""
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"Widget não encontrado: {label}")
+
+
+def _timed_run(at, latencies):
+    """Executa um rerun e registra a latência"""
+    start = time.perf_counter()
+    at.run(timeout=RUN_TIMEOUT)
+    latencies.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def run_session(iterations, seed, latencies, errors, mode="padrao"):
+    """Simula um espectador: carrega os dados e percorre filtros e abas
+
+    No modo interativo, métrica, resultado e times da aba Gráficos são
+    filtrados no navegador, então só os widgets da sidebar e da aba Partidas
+    geram reruns.
+    """
+    rng = random.Random(seed)
+    interactive = mode == "interativo"
+    try:
+        at = AppTest.from_file(APP_FILE, default_timeout=RUN_TIMEOUT)
+        _timed_run(at, latencies)
+
+        # Carregar dados (o clique dispara st.rerun)
+        at.sidebar.button[0].click()
+        _timed_run(at, latencies)
+
+        if interactive:
+            _widget(at.sidebar.toggle, "⚡ Gráficos interativos").set_value(True)
+            _timed_run(at, latencies)
+
+        for _ in range(iterations):
+            # Filtros da sidebar
+            phases = _widget(at.sidebar.multiselect, "Fase da Competição")
+            phases.set_value(rng.sample(phases.options, k=rng.randint(1, len(phases.options))))
+            _timed_run(at, latencies)
+
+            result = _widget(at.sidebar.selectbox, "Resultado")
+            result.select(rng.choice(result.options))
+            _timed_run(at, latencies)
+
+            # Aba Partidas: busca e ordenação
+            _widget(at.text_input, "🔍 Buscar por time:").input(f"Team {rng.randint(0, 31):02d}")
+            _timed_run(at, latencies)
+
+            sort_by = _widget(at.selectbox, "Ordenar por:")
+            sort_by.select(rng.choice(sort_by.options))
+            _timed_run(at, latencies)
+
+            if interactive:
+                continue
+
+            # Aba Gráficos: métrica e times comparados
+            metric = _widget(at.selectbox, "Comparar Pontos por Jogo com:")
+            metric.select(rng.choice(metric.options))
+            _timed_run(at, latencies)
+
+            teams = _widget(at.multiselect, "Selecione times para comparar:")
+            teams.set_value(rng.sample(teams.options, k=rng.randint(1, 8)))
+            _timed_run(at, latencies)
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+
+
+# Métricas do processo
+def resident_memory_mb():
+    """Memória residente atual do processo em MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        # Fallback: pico de memória (KB no Linux, bytes no macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class PeakMemorySampler:
+    """Amostra a memória residente em segundo plano e guarda o pico"""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = resident_memory_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, resident_memory_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, resident_memory_mb())
+
+
+def run_level(n_sessions, iterations, mode):
+    """Executa N sessões simultâneas e resume latência, CPU e memória"""
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=run_session, args=(iterations, seed, latencies, errors, mode))
+        for seed in range(n_sessions)
+    ]
+
+    rss_before = resident_memory_mb()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+
+    # Pico medido enquanto as sessões (e seus AppTest) ainda estão vivas
+    with PeakMemorySampler() as sampler:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    wall = time.perf_counter() - wall_before
+    cpu = time.process_time() - cpu_before
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'mode': mode,
+        'sessions': n_sessions,
+        'reruns': len(latencies),
+        'errors': errors,
+        'latency_ms': {
+            'p50': round(float(np.percentile(latencies_ms, 50)), 2) if len(latencies_ms) else None,
+            'p95': round(float(np.percentile(latencies_ms, 95)), 2) if len(latencies_ms) else None,
+            'p99': round(float(np.percentile(latencies_ms, 99)), 2) if len(latencies_ms) else None,
+        },
+        'wall_s': round(wall, 3),
+        'cpu_s': round(cpu, 3),
+        'cpu_s_per_session': round(cpu / n_sessions, 3),
+        'cpu_utilization_pct': round(cpu / wall * 100, 1) if wall > 0 else None,
+        'rss_peak_mb': round(sampler.peak, 1),
+        'rss_mb_per_session': round(max(sampler.peak - rss_before, 0) / n_sessions, 2),
+    }
+
+
+def current_commit():
+    """Hash curto do commit atual (ou 'unknown' fora de um repositório git)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(APP_FILE), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report):
+    """Imprime o relatório em formato de tabela"""
+    print(f"Commit {report['commit']} • {report['iterations']} iterações por sessão")
+    print(f"{'modo':>10} {'N':>4} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'CPU s/sess':>11} {'CPU %':>7} {'pico MB':>8} {'MB/sess':>8} {'erros':>6}")
+    for level in report['levels']:
+        latency = level['latency_ms']
+        print(f"{level['mode']:>10} {level['sessions']:>4} {level['reruns']:>7} {latency['p50'] or 0:>9.1f} "
+              f"{latency['p95'] or 0:>9.1f} {latency['p99'] or 0:>9.1f} "
+              f"{level['cpu_s_per_session']:>11.3f} {level['cpu_utilization_pct'] or 0:>7.1f} "
+              f"{level['rss_peak_mb']:>8.1f} {level['rss_mb_per_session']:>8.2f} {len(level['errors']):>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do dashboard com sessões simultâneas")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Quantidades de sessões simultâneas a testar")
+    parser.add_argument("--iterations", type=int, default=3,
+                        help="Rodadas de interações por sessão")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES,
+                        help="Modos da aba Gráficos a medir")
+    parser.add_argument("--output", default=None,
+                        help="Arquivo JSON do relatório (padrão: load_test_reports/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    # Servir dados pelo stub local em vez da API
+    StubHTTPSConnection.body = json.dumps(build_stub_payload()).encode("utf-8")
+    http.client.HTTPSConnection = StubHTTPSConnection
+
+    # Aquecimento: popula o cache do fetch_all_data fora da medição
+    warmup_errors = []
+    run_session(0, seed=-1, latencies=[], errors=warmup_errors)
+    if warmup_errors:
+        print("Falha no aquecimento; teste de carga abortado:", file=sys.stderr)
+        for error in warmup_errors:
+            print(f"  {error}", file=sys.stderr)
+        return 2
+
+    report = {
+        'commit': current_commit(),
+        'created': datetime.now(timezone.utc).isoformat(),
+        'iterations': args.iterations,
+        'python': sys.version.split()[0],
+        'levels': [run_level(n, args.iterations, mode) for mode in args.modes for n in args.sessions],
+    }
+
+    output = args.output or os.path.join(REPORT_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print_report(report)
+    print(f"Relatório salvo em {output}")
+    return 1 if any(level['errors'] for level in report['levels']) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())